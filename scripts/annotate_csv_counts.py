@@ -11,26 +11,62 @@ same directory and writes `quality_summary - Copy.with_counts.csv` next to it.
 # python3 annotate_csv_counts.py
 import csv
 import json
+import mmap
 import os
 import re
+import sys
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 ROOT = Path(__file__).resolve().parents[1]
 CSV_IN = ROOT / 'quality_summary - Copy.csv'
 CSV_OUT = ROOT / 'quality_summary - Copy.with_counts.csv'
 
-TEST_ANNOT_RE = re.compile(r"@(?:[A-Za-z0-9_]+\.)*Test\b")
-
-def _strip_java_comments(source: str) -> str:
-    """Remove /* ... */ block comments and // line comments from Java source.
-    This is not a full Java parser but is sufficient to avoid counting @Test inside
-    comments in generated test files.
-    """
-    # remove block comments
-    source = re.sub(r"/\*.*?\*/", "", source, flags=re.DOTALL)
-    # remove line comments
-    source = re.sub(r"//.*?$", "", source, flags=re.MULTILINE)
-    return source
+# Run folder names (YYYYMMDDTHHMMSSZ) and the CSV timestamps they are derived from
+_RUN_RE = re.compile(r'^\d{8}T\d{6}Z')
+_ISO_TIMESTAMP_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d*)?Z?$')
+
+# Byte values used by the @Test scanner.
+_AT = ord('@')
+_SLASH = ord('/')
+_STAR = ord('*')
+_IDENT_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_')
+_QUALIFIED_BYTES = _IDENT_BYTES | {ord('.')}
+
+# One JSON token with the whitespace before it: a string (group 1; no raw
+# control characters, valid escapes only), a number or literal (group 2;
+# NaN/Infinity are left to the full parse) or a structural character (group 3).
+_JSON_TOKEN_RE = re.compile(
+    rb'[ \t\n\r]*(?:("[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*")'
+    rb'|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null)'
+    rb'|([\[\]{},:]))')
+_STRING_TOKEN = 1
+_STRUCTURAL_TOKEN = 3
+_COMMA = ord(',')
+_COLON = ord(':')
+_LBRACKET = ord('[')
+_LBRACE = ord('{')
+_MATCHING_OPENER = {ord(']'): _LBRACKET, ord('}'): _LBRACE}
+# What _count_top_level_array_items expects next inside the innermost container
+(_VALUE_OR_CLOSE, _VALUE, _COMMA_OR_CLOSE,
+ _KEY_OR_CLOSE, _KEY, _COLON_NEXT) = range(6)
+# The state right after each closer's opener, where closing is also allowed
+_EMPTY_STATE = {ord(']'): _VALUE_OR_CLOSE, ord('}'): _KEY_OR_CLOSE}
+# Deeper nesting is left to the full parse, which may hit the recursion limit
+_MAX_SCAN_DEPTH = 512
+
+# 19+ digits may be an integer wider than 64 bits, which orjson reads as a float.
+_LONG_DIGITS_RE = re.compile(rb'[0-9]{19}')
+
+# Java files at least this large are memory-mapped rather than read into memory.
+_MMAP_MIN_SIZE = 1 << 20
 
 
 def timestamp_to_folder(ts: str) -> str:
@@ -38,13 +74,18 @@ def timestamp_to_folder(ts: str) -> str:
     if ts is None:
         return ''
     s = ts.strip()
+    # produce YYYYMMDDTHHMMSSZ
+    m = _ISO_TIMESTAMP_RE.match(s)
+    if m:
+        return f"{m[1]}{m[2]}{m[3]}T{m[4]}{m[5]}{m[6]}Z"
+
+    # Less regular forms (compact, no seconds, ...): strip separators by hand
     if s.endswith('Z'):
         s = s[:-1]
     # remove fractional seconds if present
     if '.' in s:
         s = s.split('.', 1)[0]
     # remove non-digit chars except the 'T'
-    # produce YYYYMMDDTHHMMSSZ
     parts = s.split('T')
     if len(parts) != 2:
         return ''
@@ -54,121 +95,332 @@ def timestamp_to_folder(ts: str) -> str:
     return f"{datep}T{timep}Z"
 
 
-def count_tests(test_dir: Path) -> int:
-    if not test_dir.exists():
+def _scandir_recursive(path, suffix=None):
+    """Yield DirEntry objects for files under path whose name ends with suffix.
+
+    Uses an explicit stack of os.scandir calls instead of Path.rglob so that the
+    cached DirEntry type information is used and no Path objects are built per
+    entry. Unreadable directories are skipped.
+    """
+    stack = [str(path)]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for de in it:
+                if de.is_dir(follow_symlinks=False):
+                    stack.append(de.path)
+                elif suffix is None or de.name.endswith(suffix):
+                    yield de
+
+
+def _count_test_annotations(data) -> int:
+    """Count @Test annotations in Java source, ignoring those inside comments.
+
+    This is not a full Java parser but is sufficient to avoid counting @Test
+    inside comments in generated test files.
+    """
+    # data may be bytes or an mmap; mmap's `in` only tests single bytes, so use find()
+    # Most helper sources have no annotation at all; skip them before any scanning.
+    # (b'@Test' alone is not enough: qualified forms read '@org.junit.Test'.)
+    if data.find(b'Test') < 0 or data.find(b'@') < 0:
         return 0
-    total = 0
-    for p in test_dir.rglob('*.java'):
+    return _scan_test_annotations(data)
+
+
+def _scan_test_annotations(data) -> int:
+    """Single left-to-right pass over data that skips comments and counts @Test.
+
+    Only two things are ever searched for with bytes.find: the next 'Test' and
+    the next '/' before it. A '/' that opens a block or line comment moves the
+    scan past the comment; any other '/' is ignored. Each 'Test' that survives
+    needs a word boundary after it, and an '@' plus an optional dotted
+    qualifier such as 'org.junit.' before it.
+    """
+    count = 0
+    n = len(data)
+    find = data.find
+    t = find(b'Test')
+    c = find(b'/', 0, t) if t >= 0 else -1
+    while t >= 0:
+        # skip every comment that starts before the candidate 'Test'
+        while c >= 0:
+            kind = data[c + 1] if c + 1 < n else 0
+            if kind == _STAR:
+                close = find(b'*/', c + 2)
+                if close < 0:
+                    # an unterminated block comment is not a comment
+                    c = find(b'/', c + 1, t)
+                    continue
+                resume = close + 2
+            elif kind == _SLASH:
+                resume = find(b'\n', c + 2)
+                if resume < 0:
+                    return count
+            else:
+                c = find(b'/', c + 1, t)
+                continue
+            if resume > t:
+                t = find(b'Test', resume)
+                if t < 0:
+                    return count
+            c = find(b'/', resume, t)
+        end = t + 4
+        if end == n or data[end] not in _IDENT_BYTES:
+            start = t
+            while start > 0 and data[start - 1] in _QUALIFIED_BYTES:
+                start -= 1
+            qualifier = data[start:t]
+            if (start > 0 and data[start - 1] == _AT
+                    and (not qualifier or (qualifier.endswith(b'.') and all(qualifier[:-1].split(b'.'))))):
+                count += 1
+                # a qualified name is consumed whole, including any trailing '.Test'
+                while end < n and data[end] in _QUALIFIED_BYTES:
+                    end += 1
+        t = find(b'Test', end)
+        c = find(b'/', end, t) if t >= 0 else -1
+    return count
+
+
+@lru_cache(maxsize=None)
+def scan_tests(test_dir: str) -> tuple:
+    """Count .java files and @Test methods under test_dir in a single walk.
+
+    A missing test_dir simply yields no files. Rows sharing a run folder share
+    one walk, since the result is memoized per directory.
+
+    Returns:
+        Tuple of (num_test_files, num_test_methods)
+    """
+    num_files = 0
+    num_tests = 0
+    for de in _scandir_recursive(test_dir, '.java'):
+        num_files += 1
         try:
-            text = p.read_text(errors='ignore')
-            # strip comments to avoid counting @Test inside comments
-            text_nocomment = _strip_java_comments(text)
             # count occurrences per file (more robust than a single pass)
-            matches = TEST_ANNOT_RE.findall(text_nocomment)
-            total += len(matches)
+            with open(de.path, 'rb') as fh:
+                if os.fstat(fh.fileno()).st_size >= _MMAP_MIN_SIZE:
+                    # scan large files through the page cache instead of copying them
+                    with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                        num_tests += _count_test_annotations(data)
+                else:
+                    num_tests += _count_test_annotations(fh.read())
         except Exception:
             continue
-    return total
+    return (num_files, num_tests)
 
 
-def count_test_files(test_dir: Path) -> int:
-    """Count number of .java files under test_dir."""
-    if not test_dir.exists():
-        return 0
-    return sum(1 for _ in test_dir.rglob('*.java'))
+def scan_history(history_dir: str, max_tokens: dict, log: list = None) -> tuple:
+    """Count prompts and total promptToken/responseToken from all records.json files.
+
+    Every records.json file is read and parsed once for both counts, and the
+    result is memoized per history directory, so rows sharing a history
+    directory do not re-read it.
 
+    Args:
+        history_dir: The history directory containing records.json files
+        max_tokens: Dictionary with 'prompt' and 'response' keys to track maximums
+        log: Optional list collecting error messages instead of printing them
 
-def count_prompts(history_dir: Path) -> int:
-    # history_dir may be None or a Path; if missing or not existing, return 0.
+    Returns:
+        Tuple of (num_prompts, total_prompt_tokens, total_response_tokens)
+    """
+    # history_dir may be None; a missing directory simply yields no files.
     if history_dir is None:
-        return 0
-    if not history_dir.exists():
-        return 0
-    total = 0
+        return (0, 0, 0)
+
+    (num_prompts, total_prompt_tokens, total_response_tokens,
+     max_prompt, max_response, messages) = _scan_history_cached(history_dir)
+    max_tokens['prompt'] = max(max_prompt, max_tokens['prompt'])
+    max_tokens['response'] = max(max_response, max_tokens['response'])
+    # replay the messages for every row, as an uncached scan would report them
+    if log is None:
+        for message in messages:
+            print(message)
+    else:
+        log.extend(messages)
+    return (num_prompts, total_prompt_tokens, total_response_tokens)
+
+
+@lru_cache(maxsize=None)
+def _scan_history_cached(history_dir: str) -> tuple:
+    """Scan one history directory for scan_history.
+
+    Returns:
+        Tuple of (num_prompts, total_prompt_tokens, total_response_tokens,
+        max_prompt_token, max_response_token, messages)
+    """
+    max_tokens = {'prompt': 0, 'response': 0}
+    messages = []
+    report = messages.append
+    num_prompts = 0
+    total_prompt_tokens = 0
+    total_response_tokens = 0
     # For each records.json file, prefer counting individual messages inside the
     # `prompt` array of each record (more accurate). If records are plain arrays
     # without `prompt` fields, fall back to counting top-level items. Also handle
     # NDJSON (one JSON per line) by reading line-by-line.
-    for p in history_dir.rglob('records.json'):
+    for de in _scandir_recursive(history_dir, 'records.json'):
+        if de.name != 'records.json':
+            continue
         try:
-            text = p.read_text()
-        except Exception:
+            with open(de.path, 'rb') as fh:
+                raw = fh.read()
+        except Exception as e:
+            report(str(e))
             continue
 
-        counted_for_file = 0
+        # Without any prompt/token keys every record counts as 1 and adds no
+        # tokens, so a plain array only needs its top-level items counted.
+        if b'"prompt' not in raw and b'"responseToken"' not in raw:
+            num_items = _count_top_level_array_items(raw)
+            if num_items is not None:
+                num_prompts += num_items
+                continue
+
         # Try to parse as a JSON array/object first
         try:
-            data = json.loads(text)
+            data = _loads(raw)
+        except Exception as e:
+            # not a single JSON array/object; try NDJSON (one JSON per line)
+            report(str(e))
+        else:
             if isinstance(data, list):
+                # The first record whose tokens are not numbers (e.g. null)
+                # ends the token tally of this file; the records before it
+                # keep their tokens and every record is still counted.
+                tally_tokens = True
                 for entry in data:
-                    if isinstance(entry, dict) and 'prompt' in entry and isinstance(entry['prompt'], list):
-                        counted_for_file += len(entry['prompt'])
+                    if not isinstance(entry, dict):
+                        num_prompts += 1
+                        continue
+                    if 'prompt' in entry and isinstance(entry['prompt'], list):
+                        num_prompts += len(entry['prompt'])
                     else:
                         # no prompt array: count this record as 1
-                        counted_for_file += 1
+                        num_prompts += 1
+                    if not tally_tokens:
+                        continue
+                    try:
+                        pt = entry.get('promptToken', 0)
+                        rt = entry.get('responseToken', 0)
+                        max_tokens['prompt'] = max(pt, max_tokens['prompt'])
+                        max_tokens['response'] = max(rt, max_tokens['response'])
+                        total_prompt_tokens += pt
+                        total_response_tokens += rt
+                    except Exception as e:
+                        report(str(e))
+                        tally_tokens = False
             elif isinstance(data, dict):
                 # single object: if it has a prompt array, count its length; else count 1
                 if 'prompt' in data and isinstance(data['prompt'], list):
-                    counted_for_file += len(data['prompt'])
+                    num_prompts += len(data['prompt'])
                 else:
-                    counted_for_file += 1
-            total += counted_for_file
+                    num_prompts += 1
             continue
-        except Exception:
-            # not a single JSON array/object; try NDJSON (one JSON per line)
-            pass
 
         # NDJSON fallback: parse each non-empty line as JSON
-        for line in text.splitlines():
+        for line in raw.splitlines():
             line = line.strip()
             if not line:
                 continue
             try:
-                obj = json.loads(line)
+                obj = _loads(line)
                 if isinstance(obj, dict) and 'prompt' in obj and isinstance(obj['prompt'], list):
-                    total += len(obj['prompt'])
+                    num_prompts += len(obj['prompt'])
                 else:
-                    total += 1
+                    num_prompts += 1
             except Exception:
                 # ignore malformed lines
                 continue
-    return total
+    return (num_prompts, total_prompt_tokens, total_response_tokens,
+            max_tokens['prompt'], max_tokens['response'], tuple(messages))
 
 
-def count_tokens(history_dir: Path, max_tokens: dict) -> tuple:
-    """Count total promptToken and responseToken from all records.json files.
-    
-    Args:
-        history_dir: The history directory containing records.json files
-        max_tokens: Dictionary with 'prompt' and 'response' keys to track maximums
-    
-    Returns:
-        Tuple of (total_prompt_tokens, total_response_tokens)
+def _loads(raw: bytes):
+    """Parse UTF-8 JSON bytes (records.json, class.json, classMapping.json).
+
+    Uses orjson when it is installed, as history folders hold many such files.
+    Input orjson rejects (NaN/Infinity, a BOM) or could read differently (very
+    wide integers) is parsed by json, so the counts match either way.
     """
-    if history_dir is None or not history_dir.exists():
-        return (0, 0)
-    
-    total_prompt_tokens = 0
-    total_response_tokens = 0
-    for p in history_dir.rglob('records.json'):
+    if orjson is not None and not _LONG_DIGITS_RE.search(raw):
         try:
-            text = p.read_text()
-            data = json.loads(text)
-            
-            if isinstance(data, list):
-                for entry in data:
-                    if isinstance(entry, dict):
-                        pt = entry.get('promptToken', 0)
-                        rt = entry.get('responseToken', 0)
-                        max_tokens['prompt'] = max(pt, max_tokens['prompt'])
-                        max_tokens['response'] = max(rt, max_tokens['response'])
-                        total_prompt_tokens += pt
-                        total_response_tokens += rt
-        except Exception as e:
-            print(e)
-            continue
-    
-    return (total_prompt_tokens, total_response_tokens)
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw.decode('utf-8'))
+
+
+def _count_top_level_array_items(data: bytes):
+    """Count the elements of a JSON array without building Python objects.
+
+    Every token is checked against the JSON grammar at every depth (commas,
+    colons, matching brackets, strings, numbers and literals), so a count is
+    only returned for input json.loads would accept as a single array.
+    Returns None otherwise (for example NDJSON, a JSON object, a trailing
+    comma or NaN) so the caller can fall back to parsing.
+    """
+    data = data.strip(b' \t\n\r')
+    if not data.startswith(b'[') or not data.endswith(b']'):
+        return None
+    if not data.isascii():
+        # strings must also be valid UTF-8, as for the decoded parse
+        try:
+            data.decode('utf-8')
+        except UnicodeDecodeError:
+            return None
+    stack = []
+    items = 0
+    state = _VALUE_OR_CLOSE
+    prev_end = 0
+    for m in _JSON_TOKEN_RE.finditer(data):
+        if m.start() != prev_end:
+            # bytes that are no JSON token, e.g. an invalid string or NaN
+            return None
+        prev_end = m.end()
+        kind = m.lastindex
+        if kind == _STRUCTURAL_TOKEN:
+            tok = data[prev_end - 1]
+            if tok == _COMMA:
+                if state != _COMMA_OR_CLOSE:
+                    return None
+                state = _KEY if stack[-1] == _LBRACE else _VALUE
+            elif tok == _COLON:
+                if state != _COLON_NEXT:
+                    return None
+                state = _VALUE
+            elif tok == _LBRACKET or tok == _LBRACE:
+                if state != _VALUE and state != _VALUE_OR_CLOSE:
+                    return None
+                if len(stack) == 1:
+                    items += 1
+                elif len(stack) >= _MAX_SCAN_DEPTH:
+                    return None
+                stack.append(tok)
+                state = _VALUE_OR_CLOSE if tok == _LBRACKET else _KEY_OR_CLOSE
+            else:
+                if not stack or stack.pop() != _MATCHING_OPENER[tok]:
+                    return None
+                if state != _COMMA_OR_CLOSE and state != _EMPTY_STATE[tok]:
+                    return None
+                state = _COMMA_OR_CLOSE
+                if not stack:
+                    # something may follow the array, e.g. one array per line
+                    return items if prev_end == len(data) else None
+        elif kind == _STRING_TOKEN and (state == _KEY or state == _KEY_OR_CLOSE):
+            state = _COLON_NEXT
+        else:
+            # a string, number or literal value
+            if state != _VALUE and state != _VALUE_OR_CLOSE:
+                return None
+            if len(stack) == 1:
+                items += 1
+            state = _COMMA_OR_CLOSE
+    return None
 
 
 def count_class_methods(run_dir: Path, project_name: str = None, target_class: str = None) -> int:
@@ -182,67 +434,141 @@ def count_class_methods(run_dir: Path, project_name: str = None, target_class: s
     Returns:
         Number of methods in the target class's methodSigs, or 0 if not found
     """
-    if not run_dir.exists() or not target_class:
+    if not target_class:
         return 0
-    
+    run_dir = os.fspath(run_dir)
+
     # Look for class-info directory inside run_dir/project_name/class-info
     class_info_dir = None
     if project_name:
-        candidate = run_dir / os.path.basename(project_name) / 'class-info'
-        if candidate.exists() and candidate.is_dir():
+        candidate = os.path.join(run_dir, os.path.basename(project_name), 'class-info')
+        if os.path.isdir(candidate):
             class_info_dir = candidate
-    
+
     # Fallback: search for class-info directly under run_dir
     if class_info_dir is None:
-        for p in run_dir.iterdir():
-            if p.is_dir():
-                candidate = p / 'class-info'
-                if candidate.exists() and candidate.is_dir():
-                    class_info_dir = candidate
-                    break
-    
+        try:
+            with os.scandir(run_dir) as it:
+                for de in it:
+                    if de.is_dir():
+                        candidate = os.path.join(de.path, 'class-info')
+                        if os.path.isdir(candidate):
+                            class_info_dir = candidate
+                            break
+        except OSError:
+            return 0
+
     if class_info_dir is None:
         return 0
     
     # Search for the specific target class's class.json file
     # The pattern is: class-info/.../TargetClassName/class.json
-    for class_json_path in class_info_dir.rglob('class.json'):
+    # Probe the unpackaged location directly before walking the tree.
+    num_methods = _read_method_sigs_count(os.path.join(class_info_dir, target_class, 'class.json'))
+    if num_methods is not None:
+        return num_methods
+    for de in _scandir_recursive(class_info_dir, 'class.json'):
+        if de.name != 'class.json':
+            continue
         # Check if this is the target class by checking parent directory name
-        if class_json_path.parent.name == target_class:
-            try:
-                with class_json_path.open('r') as f:
-                    data = json.load(f)
-                    # Count entries in methodSigs dictionary
-                    if 'methodSigs' in data and isinstance(data['methodSigs'], dict):
-                        return len(data['methodSigs'])
-            except Exception:
-                continue
-    
+        if os.path.basename(os.path.dirname(de.path)) == target_class:
+            num_methods = _read_method_sigs_count(de.path)
+            if num_methods is not None:
+                return num_methods
+
     return 0
 
 
-def find_history_dir(run_dir: Path, project_name: str = None) -> Path:
+def _read_method_sigs_count(path: str):
+    """Return the number of methodSigs entries in a class.json file.
+
+    Returns None if the file is missing, unreadable or has no methodSigs dict.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = _loads(f.read())
+    except Exception:
+        return None
+    # Count entries in methodSigs dictionary
+    if isinstance(data, dict) and isinstance(data.get('methodSigs'), dict):
+        return len(data['methodSigs'])
+    return None
+
+
+def find_history_dir(run_dir: Path, project_name: str = None) -> str:
+    # Several CSV rows can share a run folder, so the lookup is memoized.
+    return _find_history_dir_cached(os.fspath(run_dir), project_name)
+
+
+def _find_history_subdir(parent: str) -> str:
+    """Return the path of the first history* directory directly under parent."""
+    with os.scandir(parent) as it:
+        for de in it:
+            if de.name.startswith('history') and de.is_dir():
+                return de.path
+    return None
+
+
+@lru_cache(maxsize=None)
+def _find_history_dir_cached(run_dir_str: str, project_name: str = None) -> str:
     # look for any subdirectory starting with 'history'
     # If project_name is provided, prefer run_dir/project_name/history*
-    if not run_dir.exists():
+    if not os.path.isdir(run_dir_str):
         return None
 
     # First look inside run_dir/<project_name>/ if project_name given
     if project_name:
-        candidate = run_dir / os.path.basename(project_name)
-        if candidate.exists() and candidate.is_dir():
-            for p in candidate.iterdir():
-                if p.is_dir() and p.name.startswith('history'):
-                    return p
+        candidate = os.path.join(run_dir_str, os.path.basename(project_name))
+        if os.path.isdir(candidate):
+            history_dir = _find_history_subdir(candidate)
+            if history_dir is not None:
+                return history_dir
 
     # Fall back to searching directly under run_dir
-    for p in run_dir.iterdir():
-        if p.is_dir() and p.name.startswith('history'):
-            return p
-    return None
+    return _find_history_subdir(run_dir_str)
 
 
-def count_public_methods(history_dir: Path, target_class: str = None) -> int:
+@lru_cache(maxsize=None)
+def _load_class_mapping(parent_dir_str: str) -> dict:
+    """Load classMapping.json from parent_dir_str, memoized per directory.
+
+    Returns an empty dict if the file is missing or unreadable. Callers must
+    treat the result as read-only since it is shared between rows.
+    """
+    mapping_file = os.path.join(parent_dir_str, 'classMapping.json')
+    try:
+        with open(mapping_file, 'rb') as f:
+            return _loads(f.read())
+    except Exception:
+        return {}
+
+
+@lru_cache(maxsize=None)
+def _load_class_folders(history_dir_str: str) -> dict:
+    """Map class names to class folder paths for one history directory.
+
+    classMapping.json (next to the history directory) maps class folder names
+    to actual class names. The result is memoized per history directory so rows
+    targeting different classes share one scan; treat it as read-only.
+    """
+    class_mapping = _load_class_mapping(os.path.dirname(history_dir_str))
+    class_folders = {}
+    try:
+        with os.scandir(history_dir_str) as it:
+            for class_folder in it:
+                if not class_folder.name.startswith('class') or not class_folder.is_dir():
+                    continue
+                actual_class_name = class_folder.name
+                if class_folder.name in class_mapping:
+                    actual_class_name = class_mapping[class_folder.name].get('className', class_folder.name)
+                # keep the first folder found for a class name
+                class_folders.setdefault(actual_class_name, class_folder.path)
+    except OSError:
+        pass
+    return class_folders
+
+
+def count_public_methods(history_dir: str, target_class: str = None) -> int:
     """Count number of method folders for the target class in history directory.
     
     Args:
@@ -252,39 +578,60 @@ def count_public_methods(history_dir: Path, target_class: str = None) -> int:
     Returns:
         Number of method folders under the target class's folder, or 0 if not found
     """
-    if history_dir is None or not history_dir.exists() or not target_class:
+    if history_dir is None or not target_class:
         return 0
-    
-    # Look for class folders and match against target_class
-    # Need to check classMapping.json to map class folder names to actual class names
-    class_mapping = {}
-    parent_dir = history_dir.parent
-    mapping_file = parent_dir / 'classMapping.json'
-    
-    if mapping_file.exists():
-        try:
-            with mapping_file.open('r') as f:
-                class_mapping = json.load(f)
-        except Exception:
-            pass
-    
-    # Find the class folder that matches target_class
-    for class_folder in history_dir.iterdir():
-        if not class_folder.is_dir() or not class_folder.name.startswith('class'):
-            continue
-        
-        # Check if this class folder matches the target class
-        actual_class_name = class_folder.name
-        if class_folder.name in class_mapping:
-            actual_class_name = class_mapping[class_folder.name].get('className', class_folder.name)
-        
-        if actual_class_name == target_class:
-            # Count method folders in this class folder
-            method_count = sum(1 for p in class_folder.iterdir() 
-                             if p.is_dir() and p.name.startswith('method'))
-            return method_count
-    
-    return 0
+
+    class_folder = _load_class_folders(history_dir).get(target_class)
+    if class_folder is None:
+        return 0
+    # Count method folders in this class folder
+    with os.scandir(class_folder) as it:
+        return sum(1 for p in it if p.name.startswith('method') and p.is_dir())
+
+
+def _find_run_by_prefix(runs_by_name: dict, run_names: list, prefix: str) -> Path:
+    """Return the first run folder whose name starts with prefix, or Path().
+
+    run_names must be the sorted keys of runs_by_name; the lookup is a binary
+    search instead of a directory listing per row.
+    """
+    i = bisect_left(run_names, prefix)
+    if i < len(run_names) and run_names[i].startswith(prefix):
+        return runs_by_name[run_names[i]]
+    return Path()
+
+
+def process_row(r: dict, run_dir: Path) -> dict:
+    """Compute the count columns for one CSV row from its run folder.
+
+    Returns:
+        Dictionary of count columns plus a 'max_tokens' entry holding the row's
+        maximum promptToken/responseToken values and a 'log' list of messages
+    """
+    test_dir = os.path.join(run_dir, 'chatunitest-tests')
+    # prefer history inside the project's folder if project_root is provided
+    project_root = r.get('project_root') if isinstance(r, dict) else None
+    target_class = r.get('target_class') if isinstance(r, dict) else None
+    history_dir = find_history_dir(run_dir, project_root)
+
+    max_tokens = {'prompt': 0, 'response': 0}
+    log = []
+    num_files, num_tests = scan_tests(test_dir)
+    num_prompts, prompt_tokens, response_tokens = scan_history(history_dir, max_tokens, log)
+    num_class_methods = count_class_methods(run_dir, project_root, target_class)
+    num_public_methods = count_public_methods(history_dir, target_class)
+
+    return {
+        'num_class_methods': num_class_methods,
+        'num_public_methods': num_public_methods,
+        'num_test_files': num_files,
+        'num_test_methods': num_tests,
+        'num_chatgpt_prompts': num_prompts,
+        'total_prompt_tokens': prompt_tokens,
+        'total_response_tokens': response_tokens,
+        'max_tokens': max_tokens,
+        'log': log,
+    }
 
 
 def main():
@@ -335,105 +682,87 @@ def main():
         for r in reader:
             rows.append(r)
 
-    # Track max tokens across all rows
-    max_tokens = {'prompt': 0, 'response': 0}
-    max_public_methods = 0
-    total_public_methods = 0
-
     # Prefer mapping CSV rows to run folders by lexical sort order when possible,
     # and print the mapping between CSV entry (timestamp) and folder name.
-    candidate_runs = [p for p in ROOT.iterdir() if p.is_dir() and re.match(r'^\d{8}T\d{6}Z', p.name)]
-    candidate_runs = sorted(candidate_runs, key=lambda p: p.name)
-
+    runs_by_name = {p.name: p for p in ROOT.iterdir() if p.is_dir() and _RUN_RE.match(p.name)}
+    run_names = sorted(runs_by_name)
+    candidate_runs = [runs_by_name[name] for name in run_names]
+
+    # Output is collected and written once at the end rather than per row;
+    # row_headers holds each row's mapping line.
+    log = []
+    row_headers = []
+    run_dirs = []
     if len(candidate_runs) == len(rows) and len(candidate_runs) > 0:
-        print(f"Mapping CSV rows to {len(candidate_runs)} run folders by sorted order")
+        log.append(f"Mapping CSV rows to {len(candidate_runs)} run folders by sorted order")
         for idx, r in enumerate(rows):
             run_dir = candidate_runs[idx]
             # print mapping (index, timestamp -> folder)
-            print(f"Row {idx}: timestamp={r.get('timestamp','')} -> folder={run_dir.name}")
-
-            test_dir = run_dir / 'chatunitest-tests'
-            # prefer history inside the project's folder if project_root is provided
-            project_root = r.get('project_root') if isinstance(r, dict) else None
-            target_class = r.get('target_class') if isinstance(r, dict) else None
-            history_dir = find_history_dir(run_dir, project_root)
-
-            num_tests = count_tests(test_dir)
-            num_prompts = count_prompts(history_dir)
-            num_files = count_test_files(test_dir)
-            num_class_methods = count_class_methods(run_dir, project_root, target_class)
-            num_public_methods = count_public_methods(history_dir, target_class)
-            prompt_tokens, response_tokens = count_tokens(history_dir, max_tokens)
-
-            max_public_methods = max(max_public_methods, num_public_methods)
-            total_public_methods += num_public_methods
-
+            row_headers.append(f"Row {idx}: timestamp={r.get('timestamp','')} -> folder={run_dir.name}")
             r['backup_folder'] = run_dir.name
-            r['num_class_methods'] = str(num_class_methods)
-            r['num_public_methods'] = str(num_public_methods)
-            r['num_test_files'] = str(num_files)
-            r['num_test_methods'] = str(num_tests)
-            r['num_chatgpt_prompts'] = str(num_prompts)
-            r['total_prompt_tokens'] = str(prompt_tokens)
-            r['total_response_tokens'] = str(response_tokens)
+            run_dirs.append(run_dir)
     else:
         if candidate_runs:
-            print(f"Candidate run folder count ({len(candidate_runs)}) != CSV rows ({len(rows)}); falling back to timestamp mapping")
+            log.append(f"Candidate run folder count ({len(candidate_runs)}) != CSV rows ({len(rows)}); falling back to timestamp mapping")
         for r in rows:
             ts = r.get('timestamp', '')
             folder = timestamp_to_folder(ts)
-            run_dir = ROOT / folder
+            run_dir = runs_by_name.get(folder)
+            if run_dir is None:
+                run_dir = ROOT / folder
 
             # fallback: if exact folder not exist, try to find folder that startswith timestamp prefix
             if not run_dir.exists():
-                candidates = [p for p in ROOT.iterdir() if p.is_dir() and p.name.startswith(folder.rstrip('Z'))]
-                run_dir = candidates[0] if candidates else Path()
+                run_dir = _find_run_by_prefix(runs_by_name, run_names, folder.rstrip('Z'))
 
-            print(f"Timestamp {ts} -> folder {run_dir.name if run_dir.exists() else run_dir}")
-
-            test_dir = run_dir / 'chatunitest-tests'
-            project_root = r.get('project_root') if isinstance(r, dict) else None
-            target_class = r.get('target_class') if isinstance(r, dict) else None
-            history_dir = find_history_dir(run_dir, project_root)
-
-            num_tests = count_tests(test_dir)
-            num_prompts = count_prompts(history_dir)
-            num_files = count_test_files(test_dir)
-            num_class_methods = count_class_methods(run_dir, project_root, target_class)
-            num_public_methods = count_public_methods(history_dir, target_class)
-            prompt_tokens, response_tokens = count_tokens(history_dir, max_tokens)
+            row_headers.append(f"Timestamp {ts} -> folder {run_dir.name if run_dir.exists() else run_dir}")
+            r['backup_folder'] = run_dir.name if run_dir.exists() else ''
+            run_dirs.append(run_dir)
 
-            max_public_methods = max(max_public_methods, num_public_methods)
-            total_public_methods += num_public_methods
+    # Rows are independent and I/O bound, so scan their run folders concurrently.
+    # map() keeps results in row order.
+    with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 4) as ex:
+        results = list(ex.map(process_row, rows, run_dirs))
 
-            r['backup_folder'] = run_dir.name if run_dir.exists() else ''
-            r['num_class_methods'] = str(num_class_methods)
-            r['num_public_methods'] = str(num_public_methods)
-            r['num_test_files'] = str(num_files)
-            r['num_test_methods'] = str(num_tests)
-            r['num_chatgpt_prompts'] = str(num_prompts)
-            r['total_prompt_tokens'] = str(prompt_tokens)
-            r['total_response_tokens'] = str(response_tokens)
+    # Track max tokens across all rows
+    max_tokens = {'prompt': 0, 'response': 0}
+    max_public_methods = 0
+    total_public_methods = 0
+    for r, header, counts in zip(rows, row_headers, results):
+        log.append(header)
+        log.extend(counts.pop('log'))
+        row_max_tokens = counts.pop('max_tokens')
+        max_tokens['prompt'] = max(row_max_tokens['prompt'], max_tokens['prompt'])
+        max_tokens['response'] = max(row_max_tokens['response'], max_tokens['response'])
+        max_public_methods = max(max_public_methods, counts['num_public_methods'])
+        total_public_methods += counts['num_public_methods']
+        for col, value in counts.items():
+            r[col] = str(value)
+
+    # replace project_root with its basename (last folder) for compactness
+    for r in rows:
+        if r.get('project_root'):
+            r['project_root'] = os.path.basename(r['project_root'])
+
+    if log:
+        sys.stdout.write('\n'.join(log) + '\n')
 
     with CSV_OUT.open('w', newline='') as fh:
-        writer = csv.DictWriter(fh, fieldnames=fieldnames)
-        writer.writeheader()
-        for r in rows:
-            # replace project_root with its basename (last folder) for compactness
-            if r.get('project_root'):
-                try:
-                    r['project_root'] = os.path.basename(r['project_root'])
-                except Exception:
-                    pass
-            # Remove fields that are not in fieldnames
-            row_to_write = {k: v for k, v in r.items() if k in fieldnames}
-            writer.writerow(row_to_write)
+        writer = csv.writer(fh)
+        writer.writerow(fieldnames)
+        # Project each row onto fieldnames (dropping removed columns) in one call
+        writer.writerows([r.get(k, '') for k in fieldnames] for r in rows)
 
     print(f"Wrote annotated CSV to: {CSV_OUT}")
     print(f"max prompt token: {max_tokens['prompt']}")
     print(f"max response token: {max_tokens['response']}")
     print(f"max public methods: {max_public_methods}")
     print(f"total public methods: {total_public_methods}")
+
+    # the memoized directory scans and file loads are only valid for this run
+    for cached in (scan_tests, _scan_history_cached, _find_history_dir_cached,
+                   _load_class_mapping, _load_class_folders):
+        cached.cache_clear()
     return 0
 
 
@@ -7,9 +7,9 @@ Features:
 - Reads a CSV with a 'path' column; for each row, expects <path>/records.json
 - Groups errors by (attempt, round)
 - Prints PATH header, then attempt/round blocks with errorType + message lines
-- Avoids duplicate extraction by:
-  * tracking visited containers (dict/list) with a `seen` set
-  * skipping descent into an 'errorMsg' child when we already extracted from it
+- Avoids duplicate extraction by skipping descent into an 'errorMsg' child
+  when we already extracted from it (no visited set is needed: a parsed JSON
+  document is a tree, so no container is reached twice)
 
 Usage:
   python extract_grouped_errors_iter.py paths.csv -o grouped_errors.txt
@@ -26,13 +26,53 @@ import argparse
 import csv
 import json
 import os
+import re
 import sys
 from collections import defaultdict
-from typing import Any, Dict, Iterable, List, Optional, Tuple, Set
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # ijson streams large records.json arrays one record at a time; it is optional.
+    import ijson
+except ImportError:
+    ijson = None
 
 AttemptRound = Tuple[Optional[int], Optional[int]]
 ErrorEntry = Tuple[str, str]  # (errorType, message)
 
+# Placeholder context that never matches a real attempt/round value
+_NO_CONTEXT = object()
+
+# records.json files at least this large are streamed (when ijson is available)
+_STREAM_MIN_SIZE = 1 << 20
+
+# A run of 19+ digits may be an integer wider than 64 bits, which orjson
+# would turn into a float
+_LONG_DIGITS_RE = re.compile(rb"[0-9]{19}")
+
+
+def _loads(raw: bytes) -> Any:
+    """
+    Parse the bytes of a UTF-8 records.json like json.loads.
+
+    orjson (optional) is tried first since whole files are decoded here.
+    Anything it rejects (NaN/Infinity from the Java side, a BOM, ...) or might
+    read differently (very wide integers) is parsed by json instead, so the
+    extracted errors do not depend on whether orjson is installed.
+    """
+    if orjson is not None and not _LONG_DIGITS_RE.search(raw):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw.decode("utf-8"))
+
 
 def _iter_strings(x: Any) -> Iterable[str]:
     """Yield strings from x if it's a string or a list of strings."""
@@ -52,57 +92,122 @@ def collect_errors_iterative(
     Iteratively traverse `root`, grouping (errorType, message) into `sink`
     under the nearest (attempt, round) context.
     """
-    # Stack holds: (node, attempt, round)
-    stack: List[Tuple[Any, Optional[int], Optional[int]]] = [(root, None, None)]
-    seen: Set[int] = set()
-
-    while stack:
-        node, att, rnd = stack.pop()
-
-        oid = id(node)
-        if oid in seen:
-            continue
-        seen.add(oid)
+    # The stack is kept as three parallel lists (node, attempt, round) that
+    # are pushed and popped together, so no tuple is allocated per frame.
+    nodes: List[Any] = [root]
+    atts: List[Optional[int]] = [None]
+    rnds: List[Optional[int]] = [None]
+
+    # Bucket of the last (attempt, round) appended to; the sentinel forces the
+    # first lookup, and buckets are only created once they receive an entry.
+    bucket_att: Any = _NO_CONTEXT
+    bucket_rnd: Any = _NO_CONTEXT
+    bucket: List[ErrorEntry] = []
+
+    while nodes:
+        node = nodes.pop()
+        att = atts.pop()
+        rnd = rnds.pop()
 
         if isinstance(node, dict):
-            # Update context when present on this node
-            if isinstance(node.get("attempt"), int):
-                att = node["attempt"]
-            if "round" in node and (isinstance(node["round"], int) or node["round"] is None):
-                rnd = node["round"]
+            # One pass over the items picks up the context fields, the errorMsg
+            # child and the direct errorType/errorMessage pair, and collects the
+            # container children (scalars have nothing to traverse).
+            errmsg_child = None
+            etype = None
+            msgs = None
+            children: List[Any] = []
+            for k, v in node.items():
+                if isinstance(v, (dict, list)):
+                    children.append(v)
+                    if k == "errorMsg" and isinstance(v, dict):
+                        errmsg_child = v
+                    elif k == "errorMessage":
+                        msgs = v
+                elif k == "attempt":
+                    if isinstance(v, int):
+                        att = v
+                elif k == "round":
+                    if isinstance(v, int) or v is None:
+                        rnd = v
+                elif k == "errorType":
+                    etype = v
+                elif k == "errorMessage":
+                    msgs = v
 
             # Prefer explicit errorMsg container if present
             extracted_from_errmsg_child = False
-            errmsg_child = node.get("errorMsg")
-            if isinstance(errmsg_child, dict):
-                etype = errmsg_child.get("errorType")
-                msgs = errmsg_child.get("errorMessage")
-                if isinstance(etype, str) and msgs is not None:
-                    for s in _iter_strings(msgs):
-                        sink[(att, rnd)].append((etype, s))
+            if errmsg_child is not None:
+                child_etype = errmsg_child.get("errorType")
+                child_msgs = errmsg_child.get("errorMessage")
+                if isinstance(child_etype, str) and child_msgs is not None:
+                    etype = child_etype
+                    msgs = child_msgs
                     extracted_from_errmsg_child = True
 
-            # Fallback: direct errorType/errorMessage on this dict (only if we didn't use errorMsg)
-            if not extracted_from_errmsg_child:
-                etype = node.get("errorType")
-                msgs = node.get("errorMessage")
-                if isinstance(etype, str) and msgs is not None:
-                    for s in _iter_strings(msgs):
-                        sink[(att, rnd)].append((etype, s))
+            # Emit from errorMsg, else fall back to direct errorType/errorMessage on this dict
+            if extracted_from_errmsg_child or (isinstance(etype, str) and msgs is not None):
+                # errorType comes from a small vocabulary; share one string per value
+                etype = sys.intern(etype)
+                for s in _iter_strings(msgs):
+                    # Consecutive errors usually share a context, so the bucket
+                    # is only looked up again when (attempt, round) changes.
+                    if att is not bucket_att or rnd is not bucket_rnd:
+                        bucket = sink[(att, rnd)]
+                        bucket_att = att
+                        bucket_rnd = rnd
+                    bucket.append((etype, s))
 
             # Push children, but skip errorMsg child if already extracted from it
-            for k, v in node.items():
-                if extracted_from_errmsg_child and k == "errorMsg":
+            # (in a parsed tree no other key holds that same object)
+            for v in children:
+                if extracted_from_errmsg_child and v is errmsg_child:
                     continue
-                stack.append((v, att, rnd))
+                nodes.append(v)
+                atts.append(att)
+                rnds.append(rnd)
 
         elif isinstance(node, list):
             # Push list items with current context
-            for item in node:
-                stack.append((item, att, rnd))
+            nodes.extend(node)
+            atts.extend([att] * len(node))
+            rnds.extend([rnd] * len(node))
         # Scalars are ignored
 
 
+def collect_errors_streaming(
+    fp: Any,
+    sink: Dict[AttemptRound, List[ErrorEntry]],
+) -> None:
+    """
+    Stream the records of a top-level JSON array from the binary file `fp`
+    with ijson and group their errors into `sink`, exactly as
+    collect_errors_iterative would for the whole parsed array.
+
+    Only one record is materialized at a time. collect_errors_iterative visits
+    the array's items last to first, so each record's groups are kept until
+    the end and merged in that same order; nothing reaches `sink` if the
+    stream fails part way.
+    """
+    per_record: List[Dict[AttemptRound, List[ErrorEntry]]] = []
+    for record in ijson.items(fp, "item", use_float=True):
+        record_sink: Dict[AttemptRound, List[ErrorEntry]] = defaultdict(list)
+        collect_errors_iterative(record, record_sink)
+        if record_sink:
+            per_record.append(record_sink)
+
+    for record_sink in reversed(per_record):
+        for ar, entries in record_sink.items():
+            sink[ar].extend(entries)
+
+
+def _is_json_array(fp: Any) -> bool:
+    """Return True if the binary file `fp` holds a JSON array; rewinds `fp`."""
+    head = fp.read(64).lstrip()
+    fp.seek(0)
+    return head[:1] == b"["
+
+
 def extract_grouped_errors(records_path: str) -> Dict[AttemptRound, List[ErrorEntry]]:
     """
     Return:
@@ -110,11 +215,23 @@ def extract_grouped_errors(records_path: str) -> Dict[AttemptRound, List[ErrorEn
     for a single records.json file.
     """
     grouped: Dict[AttemptRound, List[ErrorEntry]] = defaultdict(list)
-    if not os.path.isfile(records_path):
-        return grouped
     try:
-        with open(records_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        with open(records_path, "rb") as f:
+            if ijson is not None and os.fstat(f.fileno()).st_size >= _STREAM_MIN_SIZE:
+                # large arrays are streamed instead of materialized whole
+                try:
+                    if _is_json_array(f):
+                        collect_errors_streaming(f, grouped)
+                        return grouped
+                except Exception:
+                    # ijson rejects some input json accepts (NaN, Infinity);
+                    # nothing reached `grouped`, so parse the whole file below
+                    pass
+                f.seek(0)
+            data = _loads(f.read())
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        # no records.json at this path: nothing to extract, and no warning
+        return grouped
     except Exception as e:
         print(f"Warning: failed to load {records_path}: {e}", file=sys.stderr)
         return grouped
@@ -123,14 +240,27 @@ def extract_grouped_errors(records_path: str) -> Dict[AttemptRound, List[ErrorEn
     return grouped
 
 
-def _sort_key(k: AttemptRound):
-    """Sort (attempt, round) with None values last."""
-    a, r = k
+def _process_one(base: str) -> Tuple[str, List[Tuple[AttemptRound, List[ErrorEntry]]]]:
+    """
+    Extract one <base>/records.json for main()'s worker pool.
+
+    Returns (records_json, groups) where groups is the list of
+    ((attempt, round), entries) pairs in output order; a plain list keeps the
+    result small to pickle back to the parent process.
+    """
+    records_json = os.path.join(base, "records.json")
+    grouped = extract_grouped_errors(records_json)
+
+    # Sort (attempt, round) with None values last: decorate each group once
+    # with its sort key, sort on that, then drop the key.
     big = 10**9
-    return (
-        1 if a is None else 0, a if a is not None else big,
-        1 if r is None else 0, r if r is not None else big
-    )
+    decorated = [
+        ((1 if a is None else 0, big if a is None else a,
+          1 if r is None else 0, big if r is None else r), (a, r), entries)
+        for (a, r), entries in grouped.items()
+    ]
+    decorated.sort(key=lambda t: t[0])
+    return records_json, [(ar, entries) for _, ar, entries in decorated]
 
 
 def main() -> None:
@@ -148,40 +278,62 @@ def main() -> None:
 
     paths: List[str] = []
     with open(args.csv, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        if not reader.fieldnames or "path" not in reader.fieldnames:
+        # Only the path column is used, so index rows directly instead of
+        # building a dict per row.
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header or "path" not in header:
             print(f"CSV missing 'path' header: {args.csv}", file=sys.stderr)
             sys.exit(2)
+        idx = header.index("path")
         for row in reader:
-            p = (row.get("path") or "").strip()
-            if p:
-                paths.append(p)
+            if idx < len(row):
+                p = row[idx].strip()
+                if p:
+                    paths.append(p)
 
     out_dir = os.path.dirname(os.path.abspath(args.out))
     if out_dir and not os.path.isdir(out_dir):
         os.makedirs(out_dir, exist_ok=True)
 
+    # The same records.json can be listed several times (e.g. several methods
+    # rolling up to one attempt dir); extract each absolute path only once.
+    unique_bases: Dict[str, str] = {}
+    for base in paths:
+        unique_bases.setdefault(os.path.abspath(os.path.join(base, "records.json")), base)
+
+    # Files are independent, so load and traverse them in worker processes;
+    # map() returns results in input order, keeping the output deterministic.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        cache: Dict[str, List[Tuple[AttemptRound, List[ErrorEntry]]]] = {
+            abs_key: groups
+            for abs_key, (_, groups) in zip(
+                unique_bases, ex.map(_process_one, unique_bases.values(), chunksize=8)
+            )
+        }
+
     total_msgs = 0
-    with open(args.out, "w", encoding="utf-8") as out_f:
+    with open(args.out, "w", encoding="utf-8", buffering=1 << 20) as out_f:
         for idx, base in enumerate(paths):
             records_json = os.path.join(base, "records.json")
-            grouped = extract_grouped_errors(records_json)
-
-            # Header per file path
-            out_f.write(f"PATH: {records_json}\n")
-
-            # Write sorted attempt/round groups
-            for ar, entries in sorted(grouped.items(), key=_sort_key):
-                attempt, round_ = ar
-                out_f.write(f"attempt={attempt} round={round_}\n")
+            # groups are only read here, so duplicates share one result
+            groups = cache[os.path.abspath(records_json)]
+            # Build each file's block as a list of strings and write it at once
+            chunks: List[str] = [f"PATH: {records_json}\n"]
+
+            # Sorted attempt/round groups
+            for (attempt, round_), entries in groups:
+                chunks.append(f"attempt={attempt} round={round_}\n")
                 for etype, msg in entries:
-                    out_f.write(f"errorType={etype}\n")
-                    msg_clean = str(msg).replace("\r", "")
-                    out_f.write(f"message={msg_clean}\n\n")
-                    total_msgs += 1
+                    # most messages have no '\r', so skip the copy replace() makes
+                    if "\r" in msg:
+                        msg = msg.replace("\r", "")
+                    chunks.append("".join(("errorType=", etype, "\nmessage=", msg, "\n\n")))
+                total_msgs += len(entries)
 
             if args.blank and idx != len(paths) - 1:
-                out_f.write("\n")
+                chunks.append("\n")
+            out_f.writelines(chunks)
 
     print(f"Wrote {total_msgs} error messages (grouped by attempt/round) to {args.out}")
 
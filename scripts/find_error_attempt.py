@@ -27,11 +27,43 @@ Output is printed to stdout; use --json for structured JSON output.
 
 import os
 import argparse
+import re
 import sys
 import json
 import csv
 from typing import List, Dict
 
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+# 19+ digits may be an integer wider than 64 bits, which orjson reads as a float
+_LONG_DIGITS_RE = re.compile(rb'[0-9]{19}')
+
+
+def _loads(raw: bytes):
+	"""Parse the bytes of a classMapping.json, with orjson if it is installed.
+
+	What orjson rejects (NaN, a BOM, ...) or may read differently (very wide
+	integers) goes to json, so a mapping json accepts is never dropped.
+	"""
+	if orjson is not None and not _LONG_DIGITS_RE.search(raw):
+		try:
+			return orjson.loads(raw)
+		except orjson.JSONDecodeError:
+			pass
+	return json.loads(raw.decode('utf-8'))
+
+
+def _sorted_scandir(path: str) -> List[os.DirEntry]:
+	"""List path with os.scandir, sorted by name like sorted(os.listdir(path)).
+
+	DirEntry caches the entry type, so is_dir() usually needs no extra stat.
+	"""
+	with os.scandir(path) as it:
+		return sorted(it, key=lambda de: de.name)
+
 
 def find_attempts_in_history(root: str) -> List[Dict[str, str]]:
 	"""Search the workspace for method folders that contain an exact 'attempt4' folder.
@@ -42,57 +74,55 @@ def find_attempts_in_history(root: str) -> List[Dict[str, str]]:
 
 	root = os.path.abspath(root)
 	results: List[Dict[str, str]] = []
+	mapping_cache: Dict[str, dict] = {}
 
 	if not os.path.isdir(root):
 		raise ValueError(f"Root path is not a directory: {root}")
 
-	for entry in sorted(os.listdir(root)):
-		entry_path = os.path.join(root, entry)
-		if not os.path.isdir(entry_path):
+	for entry_de in _sorted_scandir(root):
+		if not entry_de.is_dir():
 			continue
+		entry = entry_de.name
+		entry_path = entry_de.path
 
 		# Two cases: history* may be directly under the timestamp folder, or
 		# nested under a package folder like 'commons-csv' or 'commons-cli'.
-		# First, check direct children for history*
-		candidates = []
-		for child in sorted(os.listdir(entry_path)):
-			child_path = os.path.join(entry_path, child)
-			if not os.path.isdir(child_path):
-				continue
-			if child.startswith('history'):
-				candidates.append((child, child_path, None))
-
-		# Also check one level deeper (packages)
-		for pkg in sorted(os.listdir(entry_path)):
-			pkg_path = os.path.join(entry_path, pkg)
-			if not os.path.isdir(pkg_path):
+		# One listing of the timestamp folder serves both: direct history*
+		# children are collected, and every child folder is searched one level
+		# deeper as a package. Direct matches are still reported first.
+		direct = []
+		nested = []
+		for child in _sorted_scandir(entry_path):
+			if not child.is_dir():
 				continue
-			for child in sorted(os.listdir(pkg_path)):
-				if not child.startswith('history'):
-					continue
-				hist_path = os.path.join(pkg_path, child)
-				if os.path.isdir(hist_path):
-					candidates.append((child, hist_path, pkg_path))
+			if child.name.startswith('history'):
+				direct.append((child.name, child.path, None))
+			for grandchild in _sorted_scandir(child.path):
+				if grandchild.name.startswith('history') and grandchild.is_dir():
+					nested.append((grandchild.name, grandchild.path, child.path))
+		candidates = direct + nested
 
 		# Now for each history path look for class*/method*/attempt4
 		for hist_name, hist_path, pkg_path in candidates:
-			# Load class name mapping if available
-			class_mapping = {}
-			if pkg_path:
-				mapping_file = os.path.join(pkg_path, 'classMapping.json')
-				if os.path.isfile(mapping_file):
+			# Load class name mapping if available; every history dir of a
+			# package shares one mapping, so it is parsed once per package.
+			mapping_key = pkg_path or ''
+			class_mapping = mapping_cache.get(mapping_key)
+			if class_mapping is None:
+				class_mapping = {}
+				if pkg_path:
+					mapping_file = os.path.join(pkg_path, 'classMapping.json')
 					try:
-						with open(mapping_file, 'r') as f:
-							class_mapping = json.load(f)
+						with open(mapping_file, 'rb') as f:
+							class_mapping = _loads(f.read())
 					except Exception:
 						pass
-			
+				mapping_cache[mapping_key] = class_mapping
+
 			try:
-				for class_name in sorted(os.listdir(hist_path)):
-					if not class_name.startswith('class'):
-						continue
-					class_path = os.path.join(hist_path, class_name)
-					if not os.path.isdir(class_path):
+				for class_de in _sorted_scandir(hist_path):
+					class_name = class_de.name
+					if not class_name.startswith('class') or not class_de.is_dir():
 						continue
 
 					# Get actual class name from mapping
@@ -100,15 +130,12 @@ def find_attempts_in_history(root: str) -> List[Dict[str, str]]:
 					if class_name in class_mapping:
 						actual_class_name = class_mapping[class_name].get('className', class_name)
 
-					for method_name in sorted(os.listdir(class_path)):
-						if not method_name.startswith('method'):
-							continue
-						method_path = os.path.join(class_path, method_name)
-						if not os.path.isdir(method_path):
+					for method_de in _sorted_scandir(class_de.path):
+						if not method_de.name.startswith('method') or not method_de.is_dir():
 							continue
 
 						# look specifically for 'attempt4' only
-						attempts4_path = os.path.join(method_path, 'attempt4')
+						attempts4_path = os.path.join(method_de.path, 'attempt4')
 						if os.path.isdir(attempts4_path):
 							results.append({
 								'top_level': entry,
@@ -116,7 +143,7 @@ def find_attempts_in_history(root: str) -> List[Dict[str, str]]:
 								'history': hist_name,
 								'class': class_name,
 								'class_name': actual_class_name,
-								'method': method_name,
+								'method': method_de.name,
 								'attempt_dir': os.path.abspath(attempts4_path),
 							})
 			except PermissionError:
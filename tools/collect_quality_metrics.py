@@ -15,62 +15,243 @@ Usage examples:
 This script is defensive: missing reports are reported as null in the output.
 """
 import argparse
+import atexit
 import csv
 import json
+import mmap
 import os
+import re
+import stat
 import sys
 import xml.etree.ElementTree as ET
+import xml.parsers.expat as expat
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional, Tuple
 
+try:
+    # lxml's C parser streams large PIT/JaCoCo reports considerably faster; it is optional.
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+try:
+    # orjson decodes idflakies and flaky-lists JSON faster; it is optional.
+    import orjson
+except ImportError:
+    orjson = None
+
+# 19+ digit numbers may not fit orjson's 64-bit integers (it turns them into
+# floats), so JSON containing such a run is decoded by the json module instead.
+_LONG_DIGITS_RE = re.compile(rb'[0-9]{19}')
+
+# The first 'flaky' (any case) on a line plus the rest of that line, so each
+# match is one line that mentions it; the separators are those of str.splitlines.
+_FLAKY_LINE_RE = re.compile(rb'(?i)flaky[^\n\r\v\f\x1c-\x1e]*')
+
+# JaCoCo CSV columns read by parse_jacoco_csv: the class filter, then the counters
+_JACOCO_CSV_COLUMNS = ('CLASS', 'PACKAGE', 'INSTRUCTION_MISSED', 'INSTRUCTION_COVERED', 'LINE_MISSED', 'LINE_COVERED')
+
+# Unfiltered JaCoCo CSVs at least this large are summed with pandas when it is
+# installed; below this, importing pandas costs more than the plain csv loop.
+_PANDAS_MIN_SIZE = 16 << 20
+
+# Columns of the CSV summary written by write_csv_summary
+_CSV_SUMMARY_HEADER = (
+    'timestamp',
+    'project_root',
+    'target_class',
+    'line_coverage_pct',
+    'mutation_score_pct',
+    'flaky_count',
+    'total_generated_tests',
+    'flaky_rate_pct',
+    'pit_path',
+    'jacoco_path',
+    'idflakies_candidates',
+)
+
+# Rows queued by write_csv_summary(..., defer=True), by CSV path
+_PENDING_ROWS = {}
+
+# Versions (path, mtime_ns, size) of PIT reports already filtered by a target
+# class; filtering one of them again keeps its records (see _pit_tally)
+_PIT_FILTERED = deque(maxlen=8)
+
+# Most threads parse_idflakies_candidates reads candidate files with
+_IDF_PARSE_WORKERS = 8
+
+# Report files find_idflakies_reports picks up inside *flaky* directories
+_IDF_REPORT_SUFFIXES = frozenset({'.json', '.xml', '.txt'})
+
+# Directories find_idflakies_reports never descends into
+_WALK_SKIP_DIRS = frozenset({'.git', 'node_modules', '.venv', 'venv', '__pycache__'})
+
+
+def _stat_or_none(path: str) -> Optional[os.stat_result]:
+    """Return os.stat(path) if it is a regular file (following symlinks), else None."""
+    try:
+        st = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    return st if stat.S_ISREG(st.st_mode) else None
+
+
+def _iter_elements(xml_path: str, tag: str):
+    """Yield every element named tag below the root of an XML file, streaming.
+
+    Uses iterparse instead of building the whole tree: each yielded element is
+    complete (children included) and is cleared once the caller moves on, and
+    the root drops each finished top-level subtree, so memory stays flat no
+    matter how large the report is. The order is document order of element
+    ends; callers only aggregate counts, so this matches findall('.//tag').
+    """
+    if _lxml_etree is not None:
+        # lxml filters by tag in C and knows each element's parent
+        for _, elem in _lxml_etree.iterparse(xml_path, events=('end',), tag=tag):
+            if elem.getparent() is None:
+                continue
+            yield elem
+            elem.clear()
+            # Subtrees finished before elem and before each of its ancestors
+            # are no longer needed (unless their parent is itself a tag
+            # element whose children the caller has yet to read).
+            node = elem
+            parent = node.getparent()
+            while parent is not None:
+                if parent.tag != tag:
+                    while node.getprevious() is not None:
+                        del parent[0]
+                node = parent
+                parent = node.getparent()
+        return
+
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(xml_path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = elem
+            depth += 1
+            continue
+        depth -= 1
+        if elem.tag == tag and elem is not root:
+            yield elem
+            elem.clear()
+        if depth == 1:
+            root.clear()
+
+
+def _pit_outcome(m) -> int:
+    """Classify a PIT mutation element: 0 killed, 1 survived, 2 no coverage."""
+    status = m.get('status') or ''
+    status = status.upper()
+    if status == 'KILLED':
+        return 0
+    if status == 'SURVIVED':
+        return 1
+    if status == 'NO_COVERAGE':
+        return 2
+    # if attribute missing or unknown, fallback to detected attr
+    detected = m.get('detected')
+    if detected and detected.lower() in ('true', 'yes'):
+        return 0
+    return 1
+
+
+def _pit_names(m) -> Tuple[str, str, str]:
+    """Lowercase (mutated class, its simple name, source file stem) of a PIT mutation."""
+    # the children are read in one pass that keeps the first of each
+    # (as findtext would)
+    mutated = None
+    source_file = None
+    for child in m:
+        child_tag = child.tag
+        if child_tag == 'mutatedClass':
+            if mutated is None:
+                mutated = child.text or ''
+        elif child_tag == 'sourceFile':
+            if source_file is None:
+                source_file = child.text or ''
+    mutated_lower = (mutated or '').lower()
+    stem = os.path.splitext(os.path.basename(source_file or ''))[0].lower()
+    return mutated_lower, mutated_lower.rpartition('.')[2], stem
+
+
+@lru_cache(maxsize=8)
+def _pit_tally(pit_path: str, mtime_ns: int, size: int,
+               target: Optional[str] = None) -> Tuple[int, int, int]:
+    """(killed, survived, no_coverage) over the mutations of a PIT report.
+
+    With a lowercase target, only mutations whose mutatedClass (full or
+    simple name) or sourceFile stem equals it are counted. The report is
+    streamed; only when another target is asked for the same report version
+    are its records kept (_pit_records) for the targets that follow.
+    mtime_ns and size only key the cache, so a rewritten report is parsed again.
+    """
+    counts = [0, 0, 0]
+    if target is None:
+        for m in _iter_elements(pit_path, 'mutation'):
+            counts[_pit_outcome(m)] += 1
+    elif (pit_path, mtime_ns, size) in _PIT_FILTERED:
+        for mutated_lower, simple, stem, outcome in _pit_records(pit_path, mtime_ns, size):
+            if target == mutated_lower or target == simple or target == stem:
+                counts[outcome] += 1
+    else:
+        _PIT_FILTERED.append((pit_path, mtime_ns, size))
+        for m in _iter_elements(pit_path, 'mutation'):
+            mutated_lower, simple, stem = _pit_names(m)
+            if target == mutated_lower or target == simple or target == stem:
+                counts[_pit_outcome(m)] += 1
+    return counts[0], counts[1], counts[2]
 
-def parse_pit_mutations(pit_path: str, target_class: Optional[str] = None) -> Optional[dict]:
+
+@lru_cache(maxsize=8)
+def _pit_records(pit_path: str, mtime_ns: int, size: int) -> tuple:
+    """One (class, simple name, source stem, outcome) tuple per PIT mutation.
+
+    The names are lowercase. Filtering by one target class after another
+    scans these records instead of parsing the report again.
+    """
+    records = []
+    names = {}
+    for m in _iter_elements(pit_path, 'mutation'):
+        mutated_lower, simple, stem = _pit_names(m)
+        # the same few names repeat for every mutation; keep one copy of each
+        records.append((names.setdefault(mutated_lower, mutated_lower),
+                        names.setdefault(simple, simple),
+                        names.setdefault(stem, stem),
+                        _pit_outcome(m)))
+    return tuple(records)
+
+
+def parse_pit_mutations(pit_path: str, target_class: Optional[str] = None,
+                        st: Optional[os.stat_result] = None) -> Optional[dict]:
     """Parse PIT's mutations.xml and return counts and computed score.
 
     Score calculation: killed / (killed + survived) * 100 using only covered mutations.
     NO_COVERAGE mutations are excluded from the denominator.
+    Pass st (from _stat_or_none) when the caller already stat'ed pit_path.
+    Counts are cached per (path, mtime, size, target), and once a report has
+    been filtered for two target classes its records are kept, so further
+    targets do not parse it again.
     """
-    if not os.path.isfile(pit_path):
-        return None
+    if st is None:
+        st = _stat_or_none(pit_path)
+        if st is None:
+            return None
+
+    target = target_class.lower() if target_class else None
     try:
-        tree = ET.parse(pit_path)
-        root = tree.getroot()
+        # filter by mutatedClass (full or simple name) or sourceFile stem;
+        # the common unfiltered run never reads the mutation children
+        killed, survived, no_coverage = _pit_tally(pit_path, st.st_mtime_ns, st.st_size, target)
     except Exception as e:
         raise RuntimeError(f"Failed to parse PIT XML '{pit_path}': {e}")
-
-    killed = 0
-    survived = 0
-    no_coverage = 0
-    total = 0
-    target = target_class.lower() if target_class else None
-    for m in root.findall('.//mutation'):
-        # optionally filter by mutatedClass or sourceFile
-        mutated = m.findtext('mutatedClass') or ''
-        source_file = m.findtext('sourceFile') or ''
-        include = True
-        if target:
-            mutated_simple = mutated.split('.')[-1].lower()
-            source_simple = os.path.splitext(os.path.basename(source_file))[0].lower()
-            if not (target == mutated.lower() or target == mutated_simple or target == source_simple):
-                include = False
-        if not include:
-            continue
-
-        total += 1
-        status = m.get('status') or ''
-        status = status.upper()
-        if status == 'KILLED':
-            killed += 1
-        elif status == 'SURVIVED':
-            survived += 1
-        elif status == 'NO_COVERAGE':
-            no_coverage += 1
-        else:
-            # if attribute missing or unknown, fallback to detected attr
-            detected = m.get('detected')
-            if detected and detected.lower() in ('true', 'yes'):
-                killed += 1
-            else:
-                survived += 1
+    total = killed + survived + no_coverage
 
     covered_mutations = killed + survived
     score = None
@@ -87,36 +268,51 @@ def parse_pit_mutations(pit_path: str, target_class: Optional[str] = None) -> Op
     }
 
 
-def parse_jacoco_csv(csv_path: str, target_class: Optional[str] = None) -> Optional[dict]:
-    if not os.path.isfile(csv_path):
-        return None
+def _sum_jacoco_csv(csv_path: str, target: Optional[str]) -> Tuple[int, int, int, int]:
+    """Sum the instruction and line counters of a JaCoCo CSV row by row.
 
+    Rows whose counters are not integers are skipped. Returns
+    (instruction_missed, instruction_covered, line_missed, line_covered).
+    """
     inst_missed = 0
     inst_covered = 0
     line_missed = 0
     line_covered = 0
 
-    target = target_class.lower() if target_class else None
+    dotted_target = '.' + target if target else None
     with open(csv_path, newline='', encoding='utf-8') as fh:
-        reader = csv.DictReader(fh)
+        # Plain rows indexed by column position avoid building a dict per row.
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        cols = {name: i for i, name in enumerate(header)}
+        width = len(header)
+        # absent columns are read from an extra, always empty, field at index width
+        missing = any(name not in cols for name in _JACOCO_CSV_COLUMNS)
+        cls_i, pkg_i, im_i, ic_i, lm_i, lc_i = (cols.get(name, width) for name in _JACOCO_CSV_COLUMNS)
         for row in reader:
+            if len(row) != width or missing:
+                if not row:
+                    # blank line (DictReader skips these too)
+                    continue
+                # short rows read as empty fields; extra fields are ignored
+                row = row[:width]
+                row += [''] * (width + 1 - len(row))
             # optionally filter by CLASS / PACKAGE
-            cls = (row.get('CLASS') or '').strip()
-            pkg = (row.get('PACKAGE') or '').strip()
-            include = True
+            cls = row[cls_i].strip()
+            pkg = row[pkg_i].strip()
             if target:
-                full = (pkg + '.' + cls).strip('.')
-                if not (cls.lower() == target or full.lower() == target or cls.lower().endswith('.' + target)):
-                    include = False
-            if not include:
-                continue
+                # lowercase CLASS once; PACKAGE.CLASS is only built when needed
+                cls_lower = cls.lower()
+                if not (cls_lower == target or cls_lower.endswith(dotted_target)
+                        or (pkg + '.' + cls).strip('.').lower() == target):
+                    continue
 
             # header contains fields like INSTRUCTION_MISSED, INSTRUCTION_COVERED
             try:
-                im = int(row.get('INSTRUCTION_MISSED', '0') or 0)
-                ic = int(row.get('INSTRUCTION_COVERED', '0') or 0)
-                lm = int(row.get('LINE_MISSED', '0') or 0)
-                lc = int(row.get('LINE_COVERED', '0') or 0)
+                im = int(row[im_i] or 0)
+                ic = int(row[ic_i] or 0)
+                lm = int(row[lm_i] or 0)
+                lc = int(row[lc_i] or 0)
             except ValueError:
                 # skip malformed rows
                 continue
@@ -125,6 +321,68 @@ def parse_jacoco_csv(csv_path: str, target_class: Optional[str] = None) -> Optio
             line_missed += lm
             line_covered += lc
 
+    return inst_missed, inst_covered, line_missed, line_covered
+
+
+def _sum_jacoco_csv_pandas(csv_path: str) -> Optional[Tuple[int, int, int, int]]:
+    """Unfiltered _sum_jacoco_csv for large files, using pandas if it is installed.
+
+    Only clean files are handled here: None is returned (and the caller falls
+    back to _sum_jacoco_csv) if pandas is missing, a needed column is absent
+    or repeated, a counter column holds anything but integers, or parsing fails.
+    """
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    try:
+        with open(csv_path, newline='', encoding='utf-8') as fh:
+            header = next(csv.reader(fh), [])
+        counter_names = _JACOCO_CSV_COLUMNS[2:]
+        if any(header.count(name) != 1 for name in counter_names):
+            return None
+        # na_filter=False keeps empty fields as '', so a column with any
+        # non-integer field is not parsed as int64; index_col=False drops
+        # extra trailing fields instead of shifting columns
+        df = pd.read_csv(csv_path, usecols=list(counter_names), na_filter=False,
+                         index_col=False, encoding='utf-8')
+        sums = []
+        for name in counter_names:
+            col = df[name]
+            if col.dtype.kind != 'i':
+                return None
+            # int64 sums wrap around silently; leave huge values to Python ints
+            if len(col) and max(-int(col.min()), int(col.max())) * len(col) >= 1 << 63:
+                return None
+            sums.append(int(col.sum()))
+    except Exception:
+        return None
+    im, ic, lm, lc = sums
+    return im, ic, lm, lc
+
+
+@lru_cache(maxsize=8)
+def _jacoco_csv_sums(csv_path: str, mtime_ns: int, size: int, target: Optional[str]) -> Tuple[int, int, int, int]:
+    """Cached JaCoCo CSV sums; mtime_ns and size only key the cache."""
+    sums = None
+    if not target and size >= _PANDAS_MIN_SIZE:
+        sums = _sum_jacoco_csv_pandas(csv_path)
+    if sums is None:
+        sums = _sum_jacoco_csv(csv_path, target)
+    return sums
+
+
+def parse_jacoco_csv(csv_path: str, target_class: Optional[str] = None,
+                     st: Optional[os.stat_result] = None) -> Optional[dict]:
+    if st is None:
+        st = _stat_or_none(csv_path)
+        if st is None:
+            return None
+
+    target = target_class.lower() if target_class else None
+    inst_missed, inst_covered, line_missed, line_covered = _jacoco_csv_sums(
+        csv_path, st.st_mtime_ns, st.st_size, target)
+
     inst_total = inst_missed + inst_covered
     line_total = line_missed + line_covered
     inst_pct = round((inst_covered / inst_total * 100.0), 2) if inst_total > 0 else None
@@ -141,27 +399,232 @@ def parse_jacoco_csv(csv_path: str, target_class: Optional[str] = None) -> Optio
     }
 
 
-def find_idflakies_reports(root: str):
+def parse_jacoco_xml(xml_path: str, st: Optional[os.stat_result] = None) -> Optional[dict]:
+    """Sum the INSTRUCTION and LINE counters of a JaCoCo XML report.
+
+    The counters are streamed and summed in the same pass, without a list of
+    elements. Per-class filtering is not supported for XML; use the CSV report.
+    """
+    if st is None and _stat_or_none(xml_path) is None:
+        return None
+
+    inst_cov = 0
+    inst_miss = 0
+    line_cov = 0
+    line_miss = 0
+    for counter in _iter_elements(xml_path, 'counter'):
+        t = counter.get('type')
+        # every counter is converted, so a malformed one still fails the report
+        cov = int(counter.get('covered', '0'))
+        miss = int(counter.get('missed', '0'))
+        if t == 'INSTRUCTION':
+            inst_cov += cov
+            inst_miss += miss
+        elif t == 'LINE':
+            line_cov += cov
+            line_miss += miss
+    inst_total = inst_cov + inst_miss
+    line_total = line_cov + line_miss
+    return {
+        'path': xml_path,
+        'instruction_covered': inst_cov,
+        'instruction_missed': inst_miss,
+        'instruction_coverage_pct': round(inst_cov / inst_total * 100.0, 2) if inst_total else None,
+        'line_covered': line_cov,
+        'line_missed': line_miss,
+        'line_coverage_pct': round(line_cov / line_total * 100.0, 2) if line_total else None,
+    }
+
+
+def find_idflakies_reports(root: str, limit: Optional[int] = None, order: bool = True):
     """Return a list of candidate idflakies report files under root/target.
     The script will attempt to parse json or xml files found.
+
+    The walk stops once limit candidates are found (None or 0 for no limit); it
+    then visits directories in sorted order, so the same files are kept on
+    every run. Pass order=False when the result does not need sorting.
     """
-    candidates = []
+    seen = set()
+    # One walk covers both searches: report files inside *flaky*/*flakies*
+    # directories anywhere, and files named like idflakies/flaky reports in
+    # the common target/ locations. Tool and VCS folders are never descended.
+    t = os.path.join(root, 'target')
+    t_prefix = t + os.sep
     for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in _WALK_SKIP_DIRS]
+        if limit:
+            dirs.sort()
         low = dirpath.lower()
-        if 'idflakies' in low or 'flakies' in low or 'flaky' in low:
-            for f in files:
-                if f.lower().endswith(('.json', '.xml', '.txt')):
-                    candidates.append(os.path.join(dirpath, f))
-
-    # also look for common target/idflakies locations
-    t = os.path.join(root, 'target')
-    for dirpath, dirs, files in os.walk(t) if os.path.isdir(t) else []:
+        in_flaky_dir = 'flakies' in low or 'flaky' in low
+        in_target = dirpath == t or dirpath.startswith(t_prefix)
+        if not (in_flaky_dir or in_target):
+            continue
+        if limit:
+            files.sort()
         for f in files:
-            if 'idflakies' in f.lower() or 'flaky' in f.lower():
-                candidates.append(os.path.join(dirpath, f))
+            # the suffix test needs no lowercased copy of the whole name
+            if not (in_flaky_dir and _suffix(f) in _IDF_REPORT_SUFFIXES):
+                if not in_target:
+                    continue
+                fl = f.lower()
+                if 'idflakies' not in fl and 'flaky' not in fl:
+                    continue
+            seen.add(os.path.join(dirpath, f))
+            if limit and len(seen) >= limit:
+                print(f"Stopped searching for idflakies reports under '{root}' after {limit} candidates",
+                      file=sys.stderr)
+                return sorted(seen) if order else list(seen)
+
+    return sorted(seen) if order else list(seen)
+
+
+def _count_in_json(node, target: str) -> int:
+    """Count the lowercase target in a parsed JSON document's keys and values.
+
+    This walks the tree instead of searching json.dumps(node).lower(), and
+    gives the same count for class-name targets, which cannot span tokens.
+    Numbers and literals are matched as json.dumps writes them; strings are
+    matched as text, so non-ASCII names are found rather than their escapes.
+    """
+    count = 0
+    stack = [node]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, str):
+            count += x.lower().count(target)
+        elif isinstance(x, dict):
+            for k, v in x.items():
+                count += k.lower().count(target)
+                stack.append(v)
+        elif isinstance(x, list):
+            stack.extend(x)
+        else:
+            count += json.dumps(x).lower().count(target)
+    return count
 
-    # unique
-    return sorted(set(candidates))
+
+@contextmanager
+def _mapped(path: str):
+    """Map a file read-only for bytes/regex scanning without copying it into memory.
+
+    Empty files cannot be mapped and are given as b''.
+    """
+    with open(path, 'rb') as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+def _suffix(name: str) -> str:
+    """Lowercased extension of name, dot included ('' if none).
+
+    Unlike os.path.splitext, a leading dot counts ('.json' -> '.json'), so
+    this agrees with name.lower().endswith(suffix) while lowercasing only the tail.
+    """
+    i = name.rfind('.')
+    return name[i:].lower() if i >= 0 else ''
+
+
+def _parse_idf_json(p: str, target: Optional[str], target_re) -> Tuple[bool, int, int]:
+    """Counts from one idflakies JSON report: (parsed_any, flaky, tests)."""
+    parsed_any = False
+    flaky = 0
+    tests = 0
+    try:
+        j = _load_json_file(p)
+        # heuristics: look for numeric fields
+        if isinstance(j, dict):
+            # try common keys
+            if not target and 'flakyTests' in j and 'totalTests' in j:
+                parsed_any = True
+                flaky += int(j.get('flakyTests', 0))
+                tests += int(j.get('totalTests', 0))
+            elif not target and 'flaky' in j and isinstance(j['flaky'], list):
+                parsed_any = True
+                flaky += len(j['flaky'])
+                # total tests unknown
+            else:
+                # If target specified, try to find entries mentioning the class
+                if target:
+                    # search strings in JSON
+                    matches = _count_in_json(j, target)
+                    if matches:
+                        parsed_any = True
+                        flaky += matches
+                else:
+                    # try to count entries that look like tests
+                    maybe_tests = 0
+                    for v in j.values():
+                        if isinstance(v, list):
+                            maybe_tests += len(v)
+                    if maybe_tests:
+                        parsed_any = True
+                        tests += maybe_tests
+    except Exception:
+        # keep whatever was counted before the error
+        pass
+    return parsed_any, flaky, tests
+
+
+def _parse_idf_xml(p: str, target: Optional[str], target_re) -> Tuple[bool, int, int]:
+    """Counts from one idflakies XML report: (parsed_any, flaky, tests)."""
+    parsed_any = False
+    flaky = 0
+    tests = 0
+    try:
+        if target:
+            # Only the target text is counted, so skip building and
+            # re-serializing a tree: check the document is well-formed
+            # with a bare expat parser, then search the mapped bytes.
+            with _mapped(p) as data:
+                expat.ParserCreate().Parse(data, True)
+                matches = sum(1 for _ in target_re.finditer(data))
+            if matches:
+                parsed_any = True
+                flaky += matches
+            return parsed_any, flaky, tests
+        tree = ET.parse(p)
+        root = tree.getroot()
+        # count nodes named 'flaky' or tests with attribute flaky
+        flaky_nodes = root.findall('.//flaky')
+        if flaky_nodes:
+            parsed_any = True
+            flaky += len(flaky_nodes)
+        # count tests
+        test_nodes = root.findall('.//test') or root.findall('.//testcase')
+        if test_nodes:
+            parsed_any = True
+            tests += len(test_nodes)
+    except Exception:
+        pass
+    return parsed_any, flaky, tests
+
+
+def _parse_idf_text(p: str, target: Optional[str], target_re) -> Tuple[bool, int, int]:
+    """Counts from any other idflakies report, read as text: (parsed_any, flaky, 0)."""
+    matches = 0
+    try:
+        # plain text: look for 'flaky' occurrences or test ids
+        # scanned as mapped bytes with precompiled patterns: no copy,
+        # no decode, no lowercased copy and no list of lines
+        with _mapped(p) as data:
+            if target:
+                matches = sum(1 for _ in target_re.finditer(data))
+            else:
+                # heuristic: lines containing 'flaky' or 'FLAKY'
+                matches = sum(1 for _ in _FLAKY_LINE_RE.finditer(data))
+    except Exception:
+        pass
+    return matches > 0, matches, 0
+
+
+# idflakies report parser by file suffix; anything else is read as text
+_IDF_PARSERS = {
+    '.json': _parse_idf_json,
+    '.xml': _parse_idf_xml,
+}
 
 
 def parse_idflakies_candidates(paths, target_class: Optional[str] = None) -> Optional[dict]:
@@ -175,81 +638,23 @@ def parse_idflakies_candidates(paths, target_class: Optional[str] = None) -> Opt
     parsed_any = False
 
     target = target_class.lower() if target_class else None
-    for p in paths:
-        try:
-            if p.lower().endswith('.json'):
-                with open(p, 'r', encoding='utf-8') as fh:
-                    j = json.load(fh)
-                # heuristics: look for numeric fields
-                if isinstance(j, dict):
-                    # try common keys
-                    if not target and 'flakyTests' in j and 'totalTests' in j:
-                        parsed_any = True
-                        total_flaky += int(j.get('flakyTests', 0))
-                        total_tests += int(j.get('totalTests', 0))
-                    elif not target and 'flaky' in j and isinstance(j['flaky'], list):
-                        parsed_any = True
-                        total_flaky += len(j['flaky'])
-                        # total tests unknown
-                    else:
-                        # If target specified, try to find entries mentioning the class
-                        if target:
-                            # search strings in JSON
-                            txt = json.dumps(j).lower()
-                            matches = txt.count(target)
-                            if matches:
-                                parsed_any = True
-                                total_flaky += matches
-                        else:
-                            # try to count entries that look like tests
-                            maybe_tests = 0
-                            for v in j.values():
-                                if isinstance(v, list):
-                                    maybe_tests += len(v)
-                            if maybe_tests:
-                                parsed_any = True
-                                total_tests += maybe_tests
-                        
-            elif p.lower().endswith('.xml'):
-                try:
-                    tree = ET.parse(p)
-                    root = tree.getroot()
-                    # count nodes named 'flaky' or tests with attribute flaky
-                    flaky_nodes = root.findall('.//flaky')
-                    if flaky_nodes and not target:
-                        parsed_any = True
-                        total_flaky += len(flaky_nodes)
-                    # count tests
-                    tests = root.findall('.//test') or root.findall('.//testcase')
-                    if tests and not target:
-                        parsed_any = True
-                        total_tests += len(tests)
-                    # if target specified, search for target text in XML
-                    if target:
-                        txt = ET.tostring(root, encoding='utf-8', method='xml').lower()
-                        matches = txt.count(target.encode('utf-8'))
-                        if matches:
-                            parsed_any = True
-                            total_flaky += matches
-                except Exception:
-                    continue
-            else:
-                # plain text: look for 'flaky' occurrences or test ids
-                with open(p, 'r', encoding='utf-8', errors='ignore') as fh:
-                    txt = fh.read()
-                # heuristic: lines containing 'flaky' or 'FLAKY'
-                if target:
-                    matches = txt.lower().count(target)
-                    if matches:
-                        parsed_any = True
-                        total_flaky += matches
-                else:
-                    lines = [l for l in txt.splitlines() if 'flaky' in l.lower()]
-                    if lines:
-                        parsed_any = True
-                        total_flaky += len(lines)
-        except Exception:
-            continue
+    # case-insensitive bytes search, same as counting in data.lower()
+    target_re = re.compile(re.escape(target.encode('utf-8')), re.IGNORECASE) if target else None
+
+    def parse_one(p):
+        return _IDF_PARSERS.get(_suffix(p), _parse_idf_text)(p, target, target_re)
+
+    if len(paths) > 1:
+        # files are independent; threads overlap their reads (the parsers
+        # share no state, and the GIL is released while waiting on I/O)
+        with ThreadPoolExecutor(max_workers=min(_IDF_PARSE_WORKERS, len(paths))) as ex:
+            results = list(ex.map(parse_one, paths))
+    else:
+        results = [parse_one(p) for p in paths]
+    for found, flaky, tests in results:
+        parsed_any = parsed_any or found
+        total_flaky += flaky
+        total_tests += tests
 
     if not parsed_any:
         return None
@@ -266,18 +671,31 @@ def parse_idflakies_candidates(paths, target_class: Optional[str] = None) -> Opt
     }
 
 
-def auto_detect_reports(root: str) -> Tuple[Optional[str], Optional[str], list]:
+def auto_detect_reports(root: str, idflakies_limit: Optional[int] = None):
+    """Locate the default PIT, JaCoCo and idflakies reports under root/target.
+
+    Returns (pit_path, pit_stat, jacoco_path, jacoco_stat, idflakies_candidates);
+    a path and its stat are None when the report is missing. idflakies_limit
+    is passed to find_idflakies_reports as its limit.
+    """
     pit = os.path.join(root, 'target', 'pit-reports', 'mutations.xml')
     # prefer jacoco.csv if available
     jacoco_csv = os.path.join(root, 'target', 'site', 'jacoco', 'jacoco.csv')
     jacoco_xml = os.path.join(root, 'target', 'site', 'jacoco', 'jacoco.xml')
 
-    idflakies_candidates = find_idflakies_reports(root)
+    idflakies_candidates = find_idflakies_reports(root, limit=idflakies_limit)
 
-    pit_path = pit if os.path.isfile(pit) else None
-    jacoco_path = jacoco_csv if os.path.isfile(jacoco_csv) else (jacoco_xml if os.path.isfile(jacoco_xml) else None)
+    pit_stat = _stat_or_none(pit)
+    pit_path = pit if pit_stat else None
+    jacoco_path = None
+    jacoco_stat = None
+    for candidate in (jacoco_csv, jacoco_xml):
+        jacoco_stat = _stat_or_none(candidate)
+        if jacoco_stat:
+            jacoco_path = candidate
+            break
 
-    return pit_path, jacoco_path, idflakies_candidates
+    return pit_path, pit_stat, jacoco_path, jacoco_stat, idflakies_candidates
 
 
 def main(argv=None):
@@ -286,22 +704,29 @@ def main(argv=None):
     p.add_argument('--pit', help='path to PIT mutations.xml')
     p.add_argument('--jacoco', help='path to JaCoCo CSV or XML')
     p.add_argument('--idflakies', help='path to idflakies report or directory (optional)')
+    p.add_argument('--idflakies-limit', type=int, default=0,
+                   help='stop searching for idflakies reports after this many candidates (default 0: no limit)')
     p.add_argument('--target-class', help='optional class name to scope metrics (simple name or package.ClassName)')
     p.add_argument('--output', help='optional path to write JSON output (defaults to stdout)')
     p.add_argument('--csv', help='optional path to write one-line CSV summary')
     args = p.parse_args(argv)
 
     root = os.path.abspath(args.root)
+    idflakies_limit = args.idflakies_limit if args.idflakies_limit > 0 else None
 
     pit_path = args.pit
     jacoco_path = args.jacoco
     idflakies_input = args.idflakies
 
-    if not pit_path or not os.path.isfile(pit_path):
-        detected_pit, detected_j, detected_id = auto_detect_reports(root)
-        pit_path = pit_path or detected_pit
+    # each report is stat'ed once here; the parsers reuse the result
+    pit_stat = _stat_or_none(pit_path) if pit_path else None
+    jacoco_stat = _stat_or_none(jacoco_path) if jacoco_path else None
+    if not pit_stat:
+        detected_pit, detected_pit_stat, detected_j, detected_j_stat, detected_id = auto_detect_reports(root, idflakies_limit)
+        if not pit_path:
+            pit_path, pit_stat = detected_pit, detected_pit_stat
         if not jacoco_path:
-            jacoco_path = detected_j
+            jacoco_path, jacoco_stat = detected_j, detected_j_stat
         if not idflakies_input:
             idflakies_input = detected_id
 
@@ -327,51 +752,23 @@ def main(argv=None):
 
     # PIT
     try:
-        pit_metrics = parse_pit_mutations(pit_path, target_class=args.target_class) if pit_path else None
+        pit_metrics = parse_pit_mutations(pit_path, target_class=args.target_class, st=pit_stat) if pit_stat else None
     except Exception as e:
         pit_metrics = {'error': str(e), 'path': pit_path}
     result['pit'] = pit_metrics
 
     # JaCoCo
     jacoco_metrics = None
-    if jacoco_path:
+    if jacoco_stat:
         if jacoco_path.endswith('.csv'):
             try:
-                jacoco_metrics = parse_jacoco_csv(jacoco_path, target_class=args.target_class)
+                jacoco_metrics = parse_jacoco_csv(jacoco_path, target_class=args.target_class, st=jacoco_stat)
             except Exception as e:
                 jacoco_metrics = {'error': str(e), 'path': jacoco_path}
         else:
             # jacoco XML could be parsed for counters; try to parse instruction/line counters
             try:
-                if os.path.isfile(jacoco_path):
-                    tree = ET.parse(jacoco_path)
-                    root_el = tree.getroot()
-                    inst_cov = 0
-                    inst_miss = 0
-                    line_cov = 0
-                    line_miss = 0
-                    # If target_class requested, XML parsing per-class is harder; fall back to CSV match
-                    for counter in root_el.findall('.//counter'):
-                        t = counter.get('type')
-                        cov = int(counter.get('covered', '0'))
-                        miss = int(counter.get('missed', '0'))
-                        if t == 'INSTRUCTION':
-                            inst_cov += cov
-                            inst_miss += miss
-                        if t == 'LINE':
-                            line_cov += cov
-                            line_miss += miss
-                    inst_total = inst_cov + inst_miss
-                    line_total = line_cov + line_miss
-                    jacoco_metrics = {
-                        'path': jacoco_path,
-                        'instruction_covered': inst_cov,
-                        'instruction_missed': inst_miss,
-                        'instruction_coverage_pct': round(inst_cov / inst_total * 100.0, 2) if inst_total else None,
-                        'line_covered': line_cov,
-                        'line_missed': line_miss,
-                        'line_coverage_pct': round(line_cov / line_total * 100.0, 2) if line_total else None,
-                    }
+                jacoco_metrics = parse_jacoco_xml(jacoco_path, st=jacoco_stat)
             except Exception as e:
                 jacoco_metrics = {'error': str(e), 'path': jacoco_path}
     result['jacoco'] = jacoco_metrics
@@ -393,7 +790,7 @@ def main(argv=None):
             idf_metrics = None
     else:
         # try auto-detected candidates
-        candidates = find_idflakies_reports(root)
+        candidates = find_idflakies_reports(root, limit=idflakies_limit)
         idf_metrics = parse_idflakies_candidates(candidates, target_class=args.target_class) if candidates else None
 
     result['idflakies'] = idf_metrics
@@ -420,6 +817,22 @@ def main(argv=None):
         print(f"Failed to write CSV summary to {csv_path}: {e}", file=sys.stderr)
 
 
+def _load_json_file(path: str):
+    """json.load a UTF-8 file, through orjson when it is installed.
+
+    Anything orjson rejects or may decode differently (NaN/Infinity, huge
+    numbers, a BOM) goes through the json module, so the result is the same.
+    """
+    with open(path, 'rb') as fh:
+        data = fh.read()
+    if orjson is not None and not _LONG_DIGITS_RE.search(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data.decode('utf-8'))
+
+
 def _safe_get(d: Optional[dict], *keys):
     """Return nested value or None if any missing."""
     if not d:
@@ -434,16 +847,49 @@ def _safe_get(d: Optional[dict], *keys):
     return cur
 
 
-def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] = None):
+@lru_cache(maxsize=8)
+def _load_flaky_lists(path: str, mtime_ns: int, size: int):
+    """Parsed flaky-lists.json, cached per (path, mtime, size). Callers must not modify it."""
+    return _load_json_file(path)
+
+
+def _append_csv_rows(csv_path: str, rows: list):
+    """Append rows to csv_path, writing the header first if the file is new."""
+    write_header = not os.path.exists(csv_path)
+    # text mode already layers a TextIOWrapper over a BufferedWriter, so one
+    # explicit 64 KiB buffer and one writerows call leave a single write
+    with open(csv_path, 'a', newline='', encoding='utf-8', buffering=1 << 16) as fh:
+        writer = csv.writer(fh)
+        if write_header:
+            writer.writerow(_CSV_SUMMARY_HEADER)
+        writer.writerows(rows)
+
+
+def flush_csv_summaries():
+    """Append the rows queued by write_csv_summary(..., defer=True).
+
+    Each CSV file is opened once for all of its queued rows. This also runs at
+    interpreter exit, so callers only need it to write the rows earlier.
+    """
+    while _PENDING_ROWS:
+        csv_path, rows = _PENDING_ROWS.popitem()
+        try:
+            _append_csv_rows(csv_path, rows)
+        except OSError as e:
+            print(f"Failed to write CSV summary to {csv_path}: {e}", file=sys.stderr)
+
+
+def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] = None, defer: bool = False):
     """Write a one-row CSV with the requested metrics.
 
     Columns:
       project_root, line_coverage_pct, mutation_score_pct,
       flaky_count, total_generated_tests, flaky_rate_pct,
       pit_path, jacoco_path, idflakies_candidates
-    """
-    import csv
 
+    With defer=True the row is queued instead, for callers that summarize many
+    classes in one process; see flush_csv_summaries.
+    """
     project_root = result.get('project_root')
     line_cov = _safe_get(result.get('jacoco'), 'line_coverage_pct')
     mut_score = _safe_get(result.get('pit'), 'score_pct')
@@ -451,17 +897,19 @@ def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] =
     flaky_count = _safe_get(result.get('idflakies'), 'flaky_count')
     total_tests = _safe_get(result.get('idflakies'), 'total_tests')
     flaky_rate = _safe_get(result.get('idflakies'), 'flaky_rate_pct')
+    key = target_class or 'project'
+    # simple class name, for the legacy mapping and (lowercased) the dts list
+    simple = key.rpartition('.')[2]
     try:
         project_root = result.get('project_root')
         flakes_file = os.path.join(project_root or '.', '.dtfixingtools', 'detection-results', 'flaky-lists.json')
-        if os.path.isfile(flakes_file):
-            with open(flakes_file, 'r', encoding='utf-8') as fh:
-                j = json.load(fh)
+        flakes_stat = _stat_or_none(flakes_file)
+        if flakes_stat:
+            j = _load_flaky_lists(flakes_file, flakes_stat.st_mtime_ns, flakes_stat.st_size)
 
             # Support two observed formats:
             # 1) legacy mapping: { "<classOrProject>": { 'flaky_count': ..., ... }, ... }
             # 2) idflakies-style list: { 'dts': [ { 'name': 'pkg.ClassTest#test...', ... }, ... ] }
-            key = target_class or 'project'
             # legacy mapping
             if isinstance(j, dict) and any(k for k in j.keys() if k != 'dts'):
                 entry = None
@@ -470,7 +918,6 @@ def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] =
                 else:
                     # try simple class name fallback
                     if key and '.' in key:
-                        simple = key.split('.')[-1]
                         entry = j.get(simple, None)
                 if entry and isinstance(entry, dict):
                     flaky_count = entry.get('flaky_count', flaky_count)
@@ -483,11 +930,11 @@ def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] =
                 dts = j['dts']
                 if target_class:
                     t = target_class.lower()
-                    simple = t.split('.')[-1]
+                    simple_lower = simple.lower()
                     matches = 0
                     for item in dts:
                         name = (item.get('name') or '').lower() if isinstance(item, dict) else str(item).lower()
-                        if t in name or simple in name:
+                        if t in name or simple_lower in name:
                             matches += 1
                     if matches:
                         flaky_count = matches
@@ -506,22 +953,8 @@ def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] =
         # join paths with semicolon
         id_candidates_str = ';'.join(id_candidates)
 
-    header = [
-        'timestamp',
-        'project_root',
-        'target_class',
-        'line_coverage_pct',
-        'mutation_score_pct',
-        'flaky_count',
-        'total_generated_tests',
-        'flaky_rate_pct',
-        'pit_path',
-        'jacoco_path',
-        'idflakies_candidates',
-    ]
-
-    import datetime
-    ts = datetime.datetime.utcnow().isoformat() + 'Z'
+    # same text utcnow().isoformat() + 'Z' gave, without the deprecated utcnow()
+    ts = datetime.now(timezone.utc).replace(tzinfo=None).isoformat() + 'Z'
 
     row = [
         ts,
@@ -551,13 +984,14 @@ def write_csv_summary(result: dict, csv_path: str, target_class: Optional[str] =
         if not os.path.isdir(d):
             os.makedirs(d, exist_ok=True)
 
-    write_header = not os.path.exists(csv_path)
+    if defer:
+        _PENDING_ROWS.setdefault(csv_path, []).append(row)
+        return
     # append new row each run
-    with open(csv_path, 'a', newline='', encoding='utf-8') as fh:
-        writer = csv.writer(fh)
-        if write_header:
-            writer.writerow(header)
-        writer.writerow(row)
+    _append_csv_rows(csv_path, [row])
+
+
+atexit.register(flush_csv_summaries)
 
 
 if __name__ == '__main__':
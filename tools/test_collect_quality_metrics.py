@@ -0,0 +1,69 @@
+"""Tests for the idflakies report search budget in collect_quality_metrics.py.
+
+Run from the repository root:
+
+    python3 -m unittest tools/test_collect_quality_metrics.py
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import collect_quality_metrics as cqm  # noqa: E402
+
+
+class FindIdflakiesReportsLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        report_dir = os.path.join(self.root, 'target', 'idflakies')
+        os.makedirs(report_dir)
+        self.reports = []
+        for i in range(5):
+            path = os.path.join(report_dir, f'flaky-{i}.txt')
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write('flaky test\n')
+            self.reports.append(path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_no_limit_by_default(self):
+        self.assertEqual(cqm.find_idflakies_reports(self.root), self.reports)
+        self.assertEqual(cqm.find_idflakies_reports(self.root, limit=0), self.reports)
+
+    def test_limit_reached(self):
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            found = cqm.find_idflakies_reports(self.root, limit=3)
+        # a truncated search keeps the first candidates in sorted walk order
+        self.assertEqual(found, self.reports[:3])
+        self.assertIn('after 3 candidates', err.getvalue())
+
+    def test_limit_above_candidate_count(self):
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            found = cqm.find_idflakies_reports(self.root, limit=10)
+        self.assertEqual(found, self.reports)
+        self.assertEqual(err.getvalue(), '')
+
+    def test_cli_option_limits_auto_detected_reports(self):
+        out_json = os.path.join(self.root, 'summary.json')
+        out_csv = os.path.join(self.root, 'summary.csv')
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            cqm.main(['--root', self.root, '--idflakies-limit', '2',
+                      '--output', out_json, '--csv', out_csv])
+        with open(out_json, encoding='utf-8') as fh:
+            summary = json.load(fh)
+        self.assertEqual(summary['idflakies']['candidates'], self.reports[:2])
+        self.assertEqual(summary['idflakies']['flaky_count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()